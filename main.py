@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 PDF -> final_corpus.jsonl (full pipeline)
-- Extract text (pypdf, fallback pdfminer)
+- Extract text (pypdf, fallback pypdfium2)
 - Detect structure (BUKU/BAB/BAGIAN/Pasal)
 - Minimal cleaning (preserve separators and (1),(2) markers)
 - Build per-Pasal records
@@ -10,13 +10,20 @@ PDF -> final_corpus.jsonl (full pipeline)
 - Write final JSONL corpus
 
 Dependencies:
-  pip install pypdf pdfminer.six pandas
+  pip install pypdf pypdfium2 pandas orjson
+Optional:
+  pip install google-re2   (faster structure scan; or: pip install regex)
 """
-import json
+import mmap
+import os
 import re
+import sys
 import unicodedata
-from pathlib import Path
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from typing import List, Dict, Optional
+import orjson
 import pandas as pd
 
 # ---------------- CONFIG: sesuaikan path PDF dan nama output ----------------
@@ -34,30 +41,55 @@ PDF_FILES = [
 
 OUTPUT_FILE = "final_corpus.jsonl"
 
-# ---------------- [STEP 1] PDF extraction (pypdf, fallback pdfminer) ----------------
-def _extract_with_pypdf(pdf_path: str) -> str:
+# ---------------- [STEP 1] PDF extraction (pypdf, fallback pypdfium2) ----------------
+# import once per process (pool workers included) instead of per call, and
+# surface a missing extractor as a clear error rather than a bare ImportError
+try:
     from pypdf import PdfReader
-    reader = PdfReader(pdf_path)
-    pages = []
-    for p in reader.pages:
-        txt = p.extract_text() or ""
-        pages.append(txt.replace("\r", ""))
-    return "\n".join(pages)
-
-def _extract_with_pdfminer(pdf_path: str) -> str:
-    from pdfminer.high_level import extract_text
-    txt = extract_text(pdf_path) or ""
-    return txt.replace("\r", "")
+except ImportError:
+    PdfReader = None
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+_CR_STRIP = str.maketrans('', '', '\r')
+
+def _extract_with_pypdf(pdf_path: str) -> str:
+    if PdfReader is None:
+        raise RuntimeError("pypdf is not installed (pip install pypdf)")
+    # mmap the file so the kernel pages it in on demand instead of an
+    # upfront read() copy; PdfReader only needs a seekable file-like
+    with open(pdf_path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        reader = PdfReader(mm)
+        if not len(reader.pages):
+            return ""
+        # sample the first page: if it yields (almost) no text the PDF is
+        # likely image-only, so bail out before parsing every page and let
+        # read_pdf_text's length heuristic hit the fallback immediately
+        first = reader.pages[0].extract_text() or ""
+        if len(first) < 50:
+            return first
+        pages = [first] + [p.extract_text() or "" for p in reader.pages[1:]]
+    return "\n".join(pages).translate(_CR_STRIP)
+
+def _extract_with_pdfium(pdf_path: str) -> str:
+    if pdfium is None:
+        raise RuntimeError("pypdfium2 is not installed (pip install pypdfium2)")
+    pdf = pdfium.PdfDocument(pdf_path)
+    pages = [page.get_textpage().get_text_range() or "" for page in pdf]
+    return "\n".join(pages).translate(_CR_STRIP)
 
 def read_pdf_text(pdf_path: str) -> str:
-    # Attempt pypdf first, fallback to pdfminer if text too short or pypdf fails
+    # Attempt pypdf first, fallback to pdfium if text too short or pypdf fails
     try:
         txt = _extract_with_pypdf(pdf_path)
     except Exception:
         txt = ""
     if len(txt) < 500:
         try:
-            alt = _extract_with_pdfminer(pdf_path)
+            alt = _extract_with_pdfium(pdf_path)
             if len(alt) > len(txt):
                 return alt
         except Exception:
@@ -65,50 +97,89 @@ def read_pdf_text(pdf_path: str) -> str:
     return txt
 
 # ---------------- [STEP 2] Detect structure (BUKU/BAB/BAGIAN/PASAL) ----------------
-PASAL_ANY_RE = re.compile(r'(?im)^\s*Pasal\s+((\d+[A-Za-z]?)|([IVXLCM]+))\s*$', re.MULTILINE)
-BUKU_RE   = re.compile(r'(?im)^\s*BUKU\s+([IVXLC]+)\s*(.*)$')
-BAB_RE    = re.compile(r'(?im)^\s*BAB\s+([IVXLC]+)\s*(.*)$')
-BAGIAN_RE = re.compile(r'(?im)^\s*Bagian\s+([0-9IVXLC]+)\s*(.*)$')
+# RE2 compiles the multiline anchored scan to a DFA, which is much faster
+# than the stdlib backtracking engine on multi-MB text; fall back to the
+# third-party regex module, then stdlib re (pattern is RE2-safe: no
+# backreferences)
+try:
+    import re2 as _struct_re
+    _P = ''   # RE2 never backtracks, so possessive markers are meaningless
+except ImportError:
+    # possessive quantifiers: none of the runs here can give characters
+    # back to a later part of the pattern, so cut backtracking outright
+    # (regex module always supports them, stdlib re only from 3.11)
+    try:
+        import regex as _struct_re
+        _P = '+'
+    except ImportError:
+        _struct_re = re
+        _P = '+' if sys.version_info >= (3, 11) else ''
 
-def detect_structure(full_text: str) -> List[Dict]:
-    lines = full_text.splitlines()
-    # map line index to absolute char offset (for nearest-tag lookup)
-    line_starts = []
-    pos = 0
-    for ln in lines:
-        line_starts.append(pos)
-        pos += len(ln) + 1
+# One alternation covering all four anchors so the text is scanned once;
+# each alternative keeps the character classes of the old standalone regexes
+STRUCT_RE = _struct_re.compile((
+    r'(?im)^[ \t]*{p}(?:'
+    r'Pasal[ \t]+{p}(?P<pasal>\d+{p}[A-Za-z]?|[IVXLCM]+{p})[ \t]*{p}'
+    r'|BUKU[ \t]+{p}(?P<buku>[IVXLC]+{p})[ \t]*{p}(?P<buku_title>.*{p})'
+    r'|BAB[ \t]+{p}(?P<bab>[IVXLC]+{p})[ \t]*{p}(?P<bab_title>.*{p})'
+    r'|Bagian[ \t]+{p}(?P<bagian>[0-9IVXLC]+{p})[ \t]*{p}(?P<bagian_title>.*{p})'
+    r')$'
+).format(p=_P))
+_WS_RUN_RE = re.compile(r'[ \t]+')
+_STRUCT_KEYWORDS = ('pasal', 'buku', 'bab', 'bagian')
+
+def _struct_line_starts(full_text: str) -> List[int]:
+    # str.find is a memchr/memcmp scan, far cheaper than the regex engine's
+    # interpreter loop over the whole document; collect the start of every
+    # line containing a keyword and let STRUCT_RE verify each candidate
+    low = full_text.lower()
+    starts = set()
+    for kw in _STRUCT_KEYWORDS:
+        pos = low.find(kw)
+        while pos >= 0:
+            starts.add(low.rfind('\n', 0, pos) + 1)
+            pos = low.find(kw, pos + len(kw))
+    return sorted(starts)
 
+def detect_structure(full_text: str) -> List[Dict]:
     buku_marks, bab_marks, bagian_marks = [], [], []
-    for i, ln in enumerate(lines):
-        m = BUKU_RE.match(ln)
-        if m:
-            buku_marks.append((line_starts[i], ("BUKU", m.group(1).strip(), (m.group(2) or "").strip())))
-        m = BAB_RE.match(ln)
-        if m:
-            bab_marks.append((line_starts[i], ("BAB", m.group(1).strip(), (m.group(2) or "").strip())))
-        m = BAGIAN_RE.match(ln)
-        if m:
-            bagian_marks.append((line_starts[i], ("BAGIAN", m.group(1).strip(), (m.group(2) or "").strip())))
+    matches = []
+    for start in _struct_line_starts(full_text):
+        m = STRUCT_RE.match(full_text, start)
+        if m is None:
+            continue
+        if m.group('pasal') is not None:
+            matches.append(m)
+        elif m.group('buku') is not None:
+            buku_marks.append((m.start(), ("BUKU", m.group('buku').strip(), (m.group('buku_title') or "").strip())))
+        elif m.group('bab') is not None:
+            bab_marks.append((m.start(), ("BAB", m.group('bab').strip(), (m.group('bab_title') or "").strip())))
+        else:
+            bagian_marks.append((m.start(), ("BAGIAN", m.group('bagian').strip(), (m.group('bagian_title') or "").strip())))
 
+    # mark positions are already sorted, so the latest mark at or before a
+    # pasal start is a binary search away instead of a linear scan
     def nearest_tag(idx, marks):
-        prev = None
-        for (p, tag) in marks:
-            if p <= idx:
-                prev = tag
-            else:
-                break
-        return prev
+        positions, tags = marks
+        i = bisect_right(positions, idx)
+        return tags[i - 1] if i else None
+
+    def split_marks(marks):
+        return [p for p, _ in marks], [t for _, t in marks]
+
+    buku_marks = split_marks(buku_marks)
+    bab_marks = split_marks(bab_marks)
+    bagian_marks = split_marks(bagian_marks)
 
-    matches = list(PASAL_ANY_RE.finditer(full_text))
     out = []
     for i, m in enumerate(matches):
         start = m.start()
         end = matches[i+1].start() if i+1 < len(matches) else len(full_text)
-        pasal_label = m.group(1).strip()
-        body = full_text[start:end].strip()
-        body = re.sub(r'(?im)^\s*Pasal\s+' + re.escape(pasal_label) + r'\s*$', '', body).strip()
-        body = re.sub(r'[ \t]+', ' ', body)
+        pasal_label = m.group('pasal').strip()
+        # m.group(0) is exactly the "Pasal X" header line, so slicing past
+        # m.end() drops it without compiling a fresh regex per pasal
+        body = full_text[m.end():end].strip()
+        body = _WS_RUN_RE.sub(' ', body)
         out.append({
             "pasal_number": pasal_label,
             "text": body,
@@ -119,52 +190,105 @@ def detect_structure(full_text: str) -> List[Dict]:
     return out
 
 # ---------------- [STEP 3] Minimal cleaning / normalization ----------------
+_HYPHEN_JOIN_RE  = re.compile(r'-\n\s*')
+_ELLIPSIS_RE     = re.compile(r'\s*\.\s*\.\s*\.\s*')
+_TRAILING_WS_RE  = re.compile(r'(?m)[^\S\n]+$')
+_MANY_NEWLINE_RE = re.compile(r'\n{4,}')
+_MULTI_SPACE_RE  = re.compile(r'[ \t]{2,}')
+
 def minimal_clean(t: str) -> str:
     if t is None:
         return t
     t = t.replace('\x00', '')
-    t = unicodedata.normalize('NFKC', t)
-    t = re.sub(r'-\n\s*', '', t)               # join hyphenation
-    t = re.sub(r'\s*\.\s*\.\s*\.\s*', '…', t) # ". . ." -> …
+    # legal text is overwhelmingly ASCII; skip the NFKC copy when nothing
+    # needs normalizing (isascii is a flag check on CPython's compact str)
+    if not t.isascii() and not unicodedata.is_normalized('NFKC', t):
+        t = unicodedata.normalize('NFKC', t)
+    t = _HYPHEN_JOIN_RE.sub('', t)       # join hyphenation
+    t = _ELLIPSIS_RE.sub('…', t)         # ". . ." -> …
     # preserve long separators and (1)/(2) markers — do not remove them
-    lines = [ln.rstrip() for ln in t.splitlines()]
-    text = "\n".join(lines)
-    text = re.sub(r'\n{4,}', '\n\n', text)
-    text = re.sub(r'[ \t]{2,}', ' ', text)
+    text = _TRAILING_WS_RE.sub('', t)    # per-line rstrip without splitlines()
+    text = _MANY_NEWLINE_RE.sub('\n\n', text)
+    text = _MULTI_SPACE_RE.sub(' ', text)
     return text.strip()
 
 # ---------------- Build per-pasal records (STEP 4: mapping to structured records) ----------
-def build_records_per_pdf(cfg: Dict) -> List[Dict]:
-    pdf_path = Path(cfg["pdf"])
+RECORD_FIELDS = ("uu_code", "uu_name", "uu_number", "year", "section_type",
+                 "title", "pasal_number", "ayat_number", "buku", "bab",
+                 "bagian", "valid_from", "valid_to", "source_file", "text")
+_KEY_PREFIXES = tuple(orjson.dumps(k) + b':' for k in RECORD_FIELDS)
+
+@dataclass(slots=True)
+class Record:
+    uu_code: Optional[str]
+    uu_name: Optional[str]
+    uu_number: Optional[str]
+    year: Optional[int]
+    section_type: str
+    title: str
+    pasal_number: Optional[str]
+    ayat_number: Optional[str]
+    buku: Optional[str]
+    bab: Optional[str]
+    bagian: Optional[str]
+    valid_from: Optional[str]
+    valid_to: Optional[str]
+    source_file: Optional[str]
+    text: str
+
+    def to_jsonl(self) -> bytes:
+        # keys are fixed, so only the values need serializing; NaN from
+        # pandas round-trips becomes null like pd.isna handled before
+        parts = []
+        for prefix, name in zip(_KEY_PREFIXES, RECORD_FIELDS):
+            v = getattr(self, name)
+            if v is None or (isinstance(v, float) and v != v):
+                parts.append(prefix + b'null')
+            else:
+                parts.append(prefix + orjson.dumps(v, option=orjson.OPT_SERIALIZE_NUMPY))
+        return b'{' + b','.join(parts) + b'}'
+
+def build_records_per_pdf(cfg: Dict) -> List[Record]:
+    pdf_path = cfg["pdf"]
     raw_text = read_pdf_text(pdf_path)
     if not raw_text or not raw_text.strip():
         return []
+    # clean per block, not per document: the hyphen-join and ellipsis rules
+    # can swallow the newline before a "Pasal N" header (page-number footers
+    # like "- 27 -\n\nPasal 48"), which would hide it from the structure scan
     blocks = detect_structure(raw_text)
+    # constant per PDF; resolve once instead of per record
+    uu_code = cfg.get("uu_code")
+    uu_name = cfg.get("uu_name")
+    uu_number = cfg.get("uu_number")
+    year = cfg.get("year")
+    valid_from = cfg.get("valid_from")
+    valid_to = cfg.get("valid_to")
+    source_file = os.path.basename(pdf_path)
     records = []
     for blk in blocks:
         pasal = blk.get("pasal_number")
-        body = blk.get("text", "")
-        cleaned = minimal_clean(body)
+        cleaned = minimal_clean(blk.get("text", ""))
         buku_obj = blk.get("buku")
         bab_obj = blk.get("bab")
         bagian_obj = blk.get("bagian")
-        rec = {
-            "uu_code": cfg.get("uu_code"),
-            "uu_name": cfg.get("uu_name"),
-            "uu_number": cfg.get("uu_number"),
-            "year": cfg.get("year"),
-            "section_type": "PASAL",
-            "title": f"Pasal {pasal}",
-            "pasal_number": pasal,
-            "ayat_number": None,   # keep per-pasal at this stage
-            "buku": (buku_obj[1] if buku_obj else None),
-            "bab": (bab_obj[1] if bab_obj else None),
-            "bagian": (bagian_obj[1] if bagian_obj else None),
-            "valid_from": cfg.get("valid_from"),
-            "valid_to": cfg.get("valid_to"),
-            "source_file": pdf_path.name,
-            "text": cleaned
-        }
+        rec = Record(
+            uu_code=uu_code,
+            uu_name=uu_name,
+            uu_number=uu_number,
+            year=year,
+            section_type="PASAL",
+            title=f"Pasal {pasal}",
+            pasal_number=pasal,
+            ayat_number=None,   # keep per-pasal at this stage
+            buku=(buku_obj[1] if buku_obj else None),
+            bab=(bab_obj[1] if bab_obj else None),
+            bagian=(bagian_obj[1] if bagian_obj else None),
+            valid_from=valid_from,
+            valid_to=valid_to,
+            source_file=source_file,
+            text=cleaned
+        )
         records.append(rec)
     return records
 
@@ -212,31 +336,39 @@ def drop_penjelasan_df(df: pd.DataFrame) -> pd.DataFrame:
 
 # ---------------- [STEP 7] Final write JSONL (corpus assembly) ----------------
 def write_jsonl_from_df(df: pd.DataFrame, out_path: str):
-    with open(out_path, "a", encoding="utf-8") as fh:
-        for _, row in df.iterrows():
-            rec = {k: (None if pd.isna(v) else v) for k, v in row.to_dict().items()}
-            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    # rows carry the fixed Record schema, so skip the per-row dict build
+    # and let Record.to_jsonl format each line directly
+    rows = df[list(RECORD_FIELDS)].itertuples(index=False, name=None)
+    lines = [Record(*vals).to_jsonl() for vals in rows]
+    with open(out_path, "wb") as fh:
+        fh.write(b"\n".join(lines) + b"\n")
 
 # ---------------- MAIN flow ----------------
 def main():
-    outp = Path(OUTPUT_FILE)
-    # clear output
-    outp.write_text("", encoding="utf-8")
     total_records = 0
 
-    all_records = []
+    cfgs = []
     for cfg in PDF_FILES:
-        p = Path(cfg["pdf"])
-        if not p.exists():
-            print(f"Missing: {p}  (skipping)")
-            continue
-        try:
-            recs = build_records_per_pdf(cfg)  # STEP 1..3..4
-        except Exception as e:
-            print(f"Error processing {p}: {e}")
+        # plain str paths throughout: one stat here is the only FS touch
+        if not os.path.exists(cfg["pdf"]):
+            print(f"Missing: {cfg['pdf']}  (skipping)")
             continue
-        all_records.extend(recs)
-        print(f" Extracted {len(recs)} pasal-records from {p.name}")
+        cfgs.append(cfg)
+
+    # PDF parsing is CPU-bound and each file is independent, so fan the
+    # per-PDF work out to a process pool (STEP 1..3..4 run in the workers)
+    all_records = []
+    if cfgs:
+        with ProcessPoolExecutor(max_workers=min(len(cfgs), os.cpu_count() or 1)) as ex:
+            futures = [(cfg, ex.submit(build_records_per_pdf, cfg)) for cfg in cfgs]
+            for cfg, fut in futures:
+                try:
+                    recs = fut.result()
+                except Exception as e:
+                    print(f"Error processing {cfg['pdf']}: {e}")
+                    continue
+                all_records.extend(recs)
+                print(f" Extracted {len(recs)} pasal-records from {os.path.basename(cfg['pdf'])}")
 
     if not all_records:
         print("No records extracted. Exiting.")
@@ -260,9 +392,9 @@ def main():
     print(f"After drop_penjelasan: {len(df)} rows remain")
 
     # STEP 7: write final JSONL (merge corpus)
-    write_jsonl_from_df(df, outp)
+    write_jsonl_from_df(df, OUTPUT_FILE)
     total_records = len(df)
-    print(f"\n WROTE TOTAL: {total_records} records → {outp}")
+    print(f"\n WROTE TOTAL: {total_records} records → {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     main()